@@ -1,15 +1,15 @@
 import sys
 import subprocess
-import platform
 
-libraries = ["requests", "dotenv", "pathlib", "argparse", "tqdm"]
+# argparse and pathlib ship with Python, so only third-party packages are listed
+libraries = ["requests", "dotenv", "tqdm"]
 
 print("Installing required libraries...")
 print()
 
-for library in libraries:
-    try:
-        print("Installing", library, "...")
-        subprocess.check_call([sys.executable, "-m", 'pip', 'install', library])
-    except subprocess.CalledProcessError:
-        print(f"Warning: Failed to install {library} with pip. Continuing anyway...")
\ No newline at end of file
+try:
+    print("Installing", ", ".join(libraries), "...")
+    # A single pip run resolves and fetches everything at once instead of once per library
+    subprocess.check_call([sys.executable, "-m", 'pip', 'install', '--disable-pip-version-check', '--no-input', *libraries])
+except subprocess.CalledProcessError:
+    print("Warning: Failed to install libraries with pip. Continuing anyway...")
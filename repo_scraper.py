@@ -1,14 +1,24 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+import random
 from pathlib import Path
-import argparse
-from dotenv import load_dotenv
 import re
 import os
+import fnmatch
+import functools
+import json
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
 
 class GitHubFileClassifier:
+    CATEGORY_CACHE_SIZE = 65536  # Distinct paths remembered by classify_file
+
     def __init__(self):
         self.file_patterns = {
             'Development': {
@@ -62,109 +72,286 @@ class GitHubFileClassifier:
                 ]
             }
         }
+        self._exact_filenames = {}
+        self._compiled_patterns = self._compile_patterns()
+        self._classify_cached = functools.lru_cache(maxsize=self.CATEGORY_CACHE_SIZE)(self._classify_uncached)
+
+    def _compile_patterns(self):
+        """Precompute the lookup tables used by classify_file"""
+        compiled = []
+        for category, patterns in self.file_patterns.items():
+            extensions = tuple(patterns.get('extensions', []))
+            directories = frozenset(path.strip('/') for path in patterns.get('paths', []))
+            wildcards = []
+            for pattern in patterns.get('filenames', []):
+                if '*' in pattern:
+                    wildcards.append(fnmatch.translate(pattern.lower()))
+                else:
+                    self._exact_filenames.setdefault(pattern.lower(), category)
+            wildcard_re = re.compile('|'.join(wildcards)) if wildcards else None
+            keywords = patterns.get('keywords', [])
+            keyword_re = re.compile('|'.join(map(re.escape, keywords))) if keywords else None
+            compiled.append((category, extensions, directories, wildcard_re, keyword_re))
+        return compiled
 
     def classify_file(self, filepath):
         """Classify a single file into one of the four categories"""
-        filename = filepath.split('/')[-1]
+        return self._classify_cached(filepath)
+
+    def _classify_uncached(self, filepath):
+        filename = filepath.rpartition('/')[2]
         path_lower = filepath.lower()
         filename_lower = filename.lower()
+        exact_category = self._exact_filenames.get(filename_lower)
+        path_directories = path_lower.split('/')[:-1]
         
-        for category, patterns in self.file_patterns.items():
+        for category, extensions, directories, wildcard_re, keyword_re in self._compiled_patterns:
+            # Check specific filenames
+            if exact_category == category:
+                return category
+            
             # Check file extensions
-            if 'extensions' in patterns:
-                for ext in patterns['extensions']:
-                    if filepath.endswith(ext):
-                        return category
+            if filepath.endswith(extensions):
+                return category
             
             # Check path patterns
-            if 'paths' in patterns:
-                for path_pattern in patterns['paths']:
-                    if path_pattern in path_lower:
-                        return category
+            if not directories.isdisjoint(path_directories):
+                return category
             
-            # Check specific filenames
-            if 'filenames' in patterns:
-                for pattern in patterns['filenames']:
-                    if '*' in pattern:
-                        # Handle wildcard patterns
-                        import fnmatch
-                        if fnmatch.fnmatch(filename_lower, pattern.lower()):
-                            return category
-                    elif filename_lower == pattern.lower():
-                        return category
+            # Check wildcard filenames
+            if wildcard_re and wildcard_re.match(filename_lower):
+                return category
             
             # Check keywords
-            if 'keywords' in patterns:
-                for keyword in patterns['keywords']:
-                    if keyword in filename_lower or keyword in path_lower:
-                        return category
+            if keyword_re and keyword_re.search(path_lower):
+                return category
         
         # Default to development if no other category matches
         return 'development'
 
-class FileData:
-    def __init__(self, fileinfo):
-        self.filename = fileinfo["filename"]
-        self.additions = fileinfo["additions"]
-        self.deletions = fileinfo["deletions"]
-        self.category = None
-        
-    def to_dict(self, GitHubFileClassifier):
-        total_lines_changed = self.additions + self.deletions
-        return {
-            "filename": self.filename,
-            "lines_changed": total_lines_changed,
-            "category": GitHubFileClassifier.classify_file(self.filename)
-        }
+FILE_CLASSIFIER = GitHubFileClassifier()
 
-class CommitData:
-    def __init__(self, commit):
-        self.sha = commit["sha"]
-        self.Author = commit["commit"]["author"]["name"]
-        self.Date = commit["commit"]["author"]["date"]
-        self.Files = []  # To be populated later with FileData objects
-    
-    def to_dict(self):
-        return {
-            "sha": self.sha,
-            "Author": self.Author,
-            "Date": self.Date,
-            "Files": self.Files
-        }
+class GitHubCache:
+    """SQLite cache of GitHub commit file lists and ETag-tagged commit list pages."""
+    def __init__(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._warned = False
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS commit_files (key TEXT PRIMARY KEY, files TEXT NOT NULL)")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, etag TEXT NOT NULL, body TEXT NOT NULL)")
+        except sqlite3.Error:
+            self._conn.close()
+            raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _warn(self, error):
+        """Report the first cache failure; later ones are skipped silently."""
+        if not self._warned:
+            self._warned = True
+            print(f"⚠️  Cache error, continuing uncached: {error}")
+
+    def get(self, owner, repo, sha):
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT files FROM commit_files WHERE key = ?", (f"{owner}/{repo}/{sha}",)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._warn(e)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, owner, repo, sha, files_info):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO commit_files (key, files) VALUES (?, ?)",
+                        (f"{owner}/{repo}/{sha}", json.dumps(files_info))
+                    )
+            except sqlite3.Error as e:
+                self._warn(e)
+
+    def get_response(self, url):
+        """Return (etag, body) last stored for url, or None."""
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT etag, body FROM responses WHERE url = ?", (url,)).fetchone()
+            except sqlite3.Error as e:
+                self._warn(e)
+                row = None
+        return (row[0], json.loads(row[1])) if row else None
+
+    def set_response(self, url, etag, body):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (url, etag, body) VALUES (?, ?, ?)",
+                        (url, etag, json.dumps(body))
+                    )
+            except sqlite3.Error as e:
+                self._warn(e)
+
+# The umask can only be read by setting it, so read it once before any threads start
+UMASK = os.umask(0)
+os.umask(UMASK)
 
 def write_data_to_json(data, filename):
-    """Write data to a JSON file with proper formatting."""
-    import json
+    """Stream (key, value) pairs to a JSON file, replacing it atomically once complete."""
+    entries = iter(data.items() if isinstance(data, dict) else data)
+    data_error = None
+    tmp_path = None
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-        print(f"✅ Data successfully written to {filename}")
-        return True
-    except Exception as e:
+        with tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', delete=False,
+            dir=os.path.dirname(os.path.abspath(filename)), prefix=f".{os.path.basename(filename)}.", suffix=".tmp"
+        ) as f:
+            tmp_path = f.name
+            f.write("{")
+            written = 0
+            while data_error is None:
+                try:
+                    key, value = next(entries)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    # Not a write failure; re-raised once the temporary file is discarded
+                    data_error = e
+                    break
+                entry = json.dumps(value, indent=2, ensure_ascii=False, default=str)
+                f.write(",\n" if written else "\n")
+                f.write(f"  {json.dumps(str(key), ensure_ascii=False)}: {entry.replace(chr(10), chr(10) + '  ')}")
+                written += 1
+            f.write("\n}" if written else "}")
+        if data_error is None:
+            # Temporary files are created 0600; keep the mode open() would have given
+            try:
+                mode = os.stat(filename).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o666 & ~UMASK
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, filename)
+            tmp_path = None
+    except OSError as e:
         print(f"❌ Error writing to JSON file {filename}: {str(e)}")
         return False
+    finally:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    if data_error is not None:
+        raise data_error
+    print(f"✅ Data successfully written to {filename}")
+    return True
 
 GITHUB_TOKEN = None
+CACHE = None
+CACHE_PATH = Path.home() / ".cache" / "iac-stats-scripts" / "github_cache.sqlite"
+MAX_RETRIES = 5
+MAX_REPO_WORKERS = 4
+MAX_COMMIT_WORKERS = 10
+MAX_CONCURRENT_REQUESTS = 10  # Across all repositories
+REQUEST_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+STOP = threading.Event()  # Set on Ctrl-C so worker threads stop early
+
+def create_session():
+    """Create a pooled HTTP session that retries transient GitHub gateway errors."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=MAX_CONCURRENT_REQUESTS,
+        max_retries=Retry(
+            total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504],
+            respect_retry_after_header=False, raise_on_status=False
+        )
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def rate_limit_delay(resp):
+    """Seconds until GitHub's rate limit window resets if it is exhausted, else None."""
+    if resp.headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in resp.headers:
+        return max(int(resp.headers["X-RateLimit-Reset"]) - time.time(), 0) + 1
+    if resp.headers.get("Retry-After", "").isdigit():
+        return int(resp.headers["Retry-After"])
+    return None
+
+def is_retryable(resp):
+    """Whether a failed response is GitHub rate limiting that is worth waiting out."""
+    if resp.status_code == 429:
+        return True
+    # 403 is also returned for bad tokens and forbidden repos; only retry it when rate limited
+    return resp.status_code == 403 and rate_limit_delay(resp) is not None
+
+SESSION = create_session()
+
+def github_get(url, headers):
+    """GET through the shared session, holding one of the global request slots; None once stopped."""
+    with REQUEST_SLOTS:
+        if STOP.is_set():
+            return None
+        return SESSION.get(url, headers=headers)
+
+def get_with_retries(url, headers, description):
+    """GET a GitHub API URL, waiting out rate limits; returns the 200/304 response or None."""
+    attempt = 0
+    while True:
+        resp = github_get(url, headers)
+        if resp is None:
+            return None
+        if resp.status_code in (200, 304):
+            delay = rate_limit_delay(resp)
+            if delay and STOP.wait(delay):
+                return None
+            return resp
+        
+        print(f"❌ Failed to fetch {description}: {resp.status_code} - {resp.text}")
+        if not is_retryable(resp) or attempt >= MAX_RETRIES:
+            return None
+        if STOP.wait(rate_limit_delay(resp) or min(3 * 2 ** attempt, 30) + random.random()):
+            return None
+        attempt += 1
+
+class CommitFetchError(Exception):
+    """Raised when a commit's changed files could not be fetched."""
+
+# ".git" is matched rather than stripped: rstrip(".git") would turn "widget" into "widge"
+GITHUB_URL_PATTERN = re.compile(
+    r"https://github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/|$)"
+    r"|git@github\.com:([^/]+)/([^/]+)\.git"
+    r"|([^/]+)/([^/]+?)(?:\.git)?(?:/|$)"  # Simple format: owner/repo
+)
 
 def parse_github_url(url):
     """Parse GitHub URL to extract owner and repo."""
-    patterns = [
-        r"https://github\.com/([^/]+)/([^/]+)/?",
-        r"git@github\.com:([^/]+)/([^/]+)\.git",
-        r"([^/]+)/([^/]+)"  # Simple format: owner/repo
-    ]
-    
-    for pattern in patterns:
-        match = re.match(pattern, url.strip())
-        if match:
-            owner, repo = match.groups()
-            return owner, repo.rstrip(".git")
+    match = GITHUB_URL_PATTERN.match(url.strip())
+    if match:
+        owner, repo = [group for group in match.groups() if group is not None]
+        return owner, repo
     
     raise ValueError(f"Invalid GitHub URL format: {url}")
 
 def get_all_commits(owner, repo):
     global GITHUB_TOKEN
-    """Get all commits for a GitHub repository with pagination."""
+    """Get all commits for a GitHub repository with pagination; returns True on success."""
     headers = {}
     headers["Authorization"] = f"token {GITHUB_TOKEN}"
     
@@ -180,93 +367,170 @@ def get_all_commits(owner, repo):
         url = f"{base_url}?page={page}&per_page={per_page}"
         
         try:
-            resp = requests.get(url, headers=headers)
+            cached = CACHE.get_response(url) if CACHE else None
+            request_headers = dict(headers, **{"If-None-Match": cached[0]}) if cached else headers
+            resp = get_with_retries(url, request_headers, "commits")
+            if resp is None:
+                return False
             
-            if resp.status_code == 200:
-                commits = resp.json()
-                
-                # If no commits returned, we've reached the end
-                if not commits:
-                    print("no commits found")
-                    break
-                
-                all_commits.extend(commits)
-                print(f"📄 Fetched page {page} - {len(commits)} commits (Total: {len(all_commits)})")
-                
-                # If we got fewer commits than per_page, we're on the last page
-                if len(commits) < per_page:
-                    break
-                
-                page += 1
-                # Small delay to be respectful to the API
-                time.sleep(0.1)
+            if resp.status_code == 304:
+                commits = cached[1]
             else:
-                print(f"❌ Failed to fetch commits: {resp.status_code} - {resp.text}")
+                commits = resp.json()
+                if CACHE and resp.headers.get("ETag"):
+                    CACHE.set_response(url, resp.headers["ETag"], commits)
+            
+            # If no commits returned, we've reached the end
+            if not commits:
+                print("no commits found")
+                break
+            
+            all_commits.extend(commits)
+            print(f"📄 Fetched page {page} - {len(commits)} commits (Total: {len(all_commits)})")
+            
+            # If we got fewer commits than per_page, we're on the last page
+            if len(commits) < per_page:
+                break
+            
+            page += 1
         except requests.exceptions.RequestException as e:
             print(f"❌ Network error: {e}")
-            return None
+            return False
     
     print(f"✅ Successfully fetched {len(all_commits)} total commits")
     
     print("Processing commit data...")
     # all commits are fetched
-    data_we_need = {}
-    for commit in tqdm(all_commits):
-        commit_obj = CommitData(commit)
-        
-        # get all the files changed in this commit
-        files_changed = get_commit_changed_files(owner, repo, commit_obj.sha)
-        commit_obj.Files = files_changed
-        data_we_need[commit_obj.sha] = commit_obj.to_dict()
+    def data_we_need():
+        with ThreadPoolExecutor(max_workers=MAX_COMMIT_WORKERS) as executor:
+            try:
+                # get all the files changed in each commit; map() keeps commit order
+                files_per_commit = executor.map(
+                    lambda commit: get_commit_changed_files(owner, repo, commit["sha"]), all_commits
+                )
+                for commit, files_changed in tqdm(zip(all_commits, files_per_commit), total=len(all_commits)):
+                    if STOP.is_set() or files_changed is None:
+                        raise CommitFetchError(f"could not fetch files for commit {commit['sha']}")
+                    author = commit["commit"]["author"]
+                    yield commit["sha"], {
+                        "sha": commit["sha"],
+                        "Author": author["name"],
+                        "Date": author["date"],
+                        "Files": files_changed
+                    }
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
 
-    # Write the processed data to a JSON file
-    write_data_to_json(data_we_need, f"{repo}.json")
+    # Stream the processed data to a JSON file as each commit completes
+    try:
+        return write_data_to_json(data_we_need(), f"{repo}.json")
+    except CommitFetchError as e:
+        if not STOP.is_set():
+            print(f"❌ {owner}/{repo}: {e}")
+        return False
 
 def get_commit_changed_files(owner, repo, sha):
+    """Get files changed in a specific commit, using the local cache when possible."""
+    if STOP.is_set():
+        return None
+    files_info = CACHE.get(owner, repo, sha) if CACHE else None
+    if files_info is None:
+        files_info = fetch_commit_files(owner, repo, sha)
+        if files_info is None:
+            return None
+        if CACHE:
+            CACHE.set(owner, repo, sha, files_info)
+    
+    classify_file = FILE_CLASSIFIER.classify_file
+    return [
+        {
+            "filename": f["filename"],
+            "lines_changed": f["additions"] + f["deletions"],
+            "category": classify_file(f["filename"])
+        }
+        for f in files_info
+    ]
+
+def fetch_commit_files(owner, repo, sha):
     global GITHUB_TOKEN
-    """Get files changed in a specific commit."""
+    """Fetch the raw filename/additions/deletions of each file in a commit from GitHub."""
     headers = {}
     headers["Authorization"] = f"token {GITHUB_TOKEN}"
     
     url = f"https://api.github.com/repos/{owner}/{repo}/commits/{sha}"
-    githubClassifier = GitHubFileClassifier()
     try:
-        resp = requests.get(url, headers=headers)
-        if resp.status_code == 200:
-            commit_data = resp.json()
-            files_info = commit_data.get("files", [])
-            files_changed = [FileData(fileinfo).to_dict(githubClassifier) for fileinfo in files_info]
-            return files_changed
-        else:
-            print(f"❌ Failed to fetch commit {sha}: {resp.status_code} - {resp.text}")
+        resp = get_with_retries(url, headers, f"commit {sha}")
+        if resp is None:
             return None
+        commit_data = resp.json()
+        return [
+            {"filename": f["filename"], "additions": f["additions"], "deletions": f["deletions"]}
+            for f in commit_data.get("files", [])
+        ]
     except requests.exceptions.RequestException as e:
         print(f"❌ Network error: {e}")
         return None
 
 def main():
+    import argparse
+    from dotenv import load_dotenv
+    
     env_path = Path(".env")
     load_dotenv(dotenv_path=env_path)
 
-    global GITHUB_TOKEN
+    global GITHUB_TOKEN, CACHE
     GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
     parser = argparse.ArgumentParser(
-        description="Get contributor statistics for a GitHub repository",
+        description="Get contributor statistics for one or more GitHub repositories",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
     parser.add_argument(
         "repository",
-        help="GitHub repository in format 'owner/repo' or full GitHub URL"
+        nargs="+",
+        help="GitHub repositories in format 'owner/repo' or full GitHub URL"
     )
     
     args = parser.parse_args()
     
     try:
-        # Parse the repository URL
-        owner, repo = parse_github_url(args.repository)
-        get_all_commits(owner, repo)
+        CACHE = GitHubCache(CACHE_PATH)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Cache unavailable, continuing without it: {e}")
+        CACHE = None
+    
+    try:
+        # Parse the repository URLs
+        repositories = []
+        outputs = {}
+        for owner, repo in map(parse_github_url, args.repository):
+            filename = f"{repo}.json"
+            previous = outputs.get(filename.lower())
+            if previous is None:
+                outputs[filename.lower()] = (owner, repo)
+                repositories.append((owner, repo))
+            elif (previous[0].lower(), previous[1].lower()) != (owner.lower(), repo.lower()):
+                raise ValueError(f"{previous[0]}/{previous[1]} and {owner}/{repo} would both write {filename}")
+        # Off the main thread so Ctrl-C returns without waiting
+        executor = ThreadPoolExecutor(max_workers=min(MAX_REPO_WORKERS, len(repositories)))
+        try:
+            results = list(executor.map(lambda owner_repo: get_all_commits(*owner_repo), repositories))
+        except KeyboardInterrupt:
+            STOP.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        
+        lookups = CACHE.hits + CACHE.misses if CACHE else 0
+        if lookups:
+            print(f"🗄️  Commit cache: {CACHE.hits}/{lookups} hits ({CACHE.hits / lookups:.0%})")
+        
+        failed = [f"{owner}/{repo}" for (owner, repo), ok in zip(repositories, results) if not ok]
+        if failed:
+            print(f"❌ Failed to analyze: {', '.join(failed)}")
+            return 1
     except ValueError as e:
         print(f"❌ Error: {e}")
         return 1
@@ -276,6 +540,9 @@ def main():
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return 1
+    finally:
+        if CACHE:
+            CACHE.close()
 
 if __name__ == "__main__":
     exit(main())
\ No newline at end of file